@@ -0,0 +1,34 @@
+"""
+Process-wide JSON file cache keyed by modification time.
+
+Lives outside streamlit_app.py because Streamlit re-executes the main
+script as a fresh module on every rerun, which would reset a cache
+defined there.
+"""
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import orjson
+
+
+# Parsed JSON per path, with the file mtime it was parsed at
+_JSON_CACHE: Dict[Path, Tuple[float, Any]] = {}
+
+
+def load_json_cached(path: Path) -> Any:
+    """
+    Parse a JSON file, reusing the previous result until the file's mtime changes.
+    
+    Args:
+        path: JSON file to load
+        
+    Returns:
+        The parsed data; the same object is returned while the file is unchanged
+    """
+    mtime = path.stat().st_mtime
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    data = orjson.loads(path.read_bytes())
+    _JSON_CACHE[path] = (mtime, data)
+    return data
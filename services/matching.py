@@ -1,19 +1,256 @@
 """
 Game recommendation matching algorithm based on user tags.
 """
-from typing import List, Dict, Tuple
+import heapq
+import threading
+from dataclasses import dataclass, field
+from typing import AbstractSet, Callable, Collection, FrozenSet, Iterable, List, Dict, Optional, Tuple
 
+import numpy as np
 
-def calculate_match_score(user_tags: List[str], game_tags: List[str]) -> float:
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+
+# Ranked results kept per GameTable before the oldest is evicted
+_RANK_MEMO_SIZE = 256
+
+# Below this many games the NumPy kernel beats thread start-up in the
+# parallel numba kernel, so numba is not even imported
+_NUMBA_MIN_ROWS = 10_000
+
+
+def build_tag_ids(games: List[Dict], extra_tags: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Intern every game tag to a small integer ID, in first-seen order.
+    
+    Args:
+        games: List of game dictionaries with a 'tags' list
+        extra_tags: Further tags to intern after the game tags (e.g. quiz option tags)
+        
+    Returns:
+        Mapping of tag string to integer ID
+    """
+    tag_ids: Dict[str, int] = {}
+    for game in games:
+        for tag in game.get("tags", ()):
+            tag_ids.setdefault(tag, len(tag_ids))
+    for tag in extra_tags:
+        tag_ids.setdefault(tag, len(tag_ids))
+    return tag_ids
+
+
+def intern_tags(tags: Iterable[str], tag_ids: Dict[str, int]) -> np.ndarray:
+    """
+    Map tag strings to their integer IDs, skipping tags outside the vocabulary.
+    
+    Args:
+        tags: Tags to map
+        tag_ids: Mapping from build_tag_ids()
+        
+    Returns:
+        int32 array of tag IDs
+    """
+    return np.array([tag_ids[tag] for tag in tags if tag in tag_ids], dtype=np.int32)
+
+
+def _game_tag_set(game: Dict) -> FrozenSet[str]:
+    """Return the game's precomputed '_tag_set', or build it from 'tags'."""
+    tag_set = game.get("_tag_set")
+    if tag_set is None:
+        tag_set = frozenset(game.get("tags", ()))
+    return tag_set
+
+
+def _pack_tag_ids(tag_ids: Iterable[int], n_words: int) -> np.ndarray:
+    """
+    Pack integer tag IDs into a row of 64-bit words (bit i of word i // 64).
+    
+    Args:
+        tag_ids: Tag IDs to set
+        n_words: Number of uint64 words in the row
+        
+    Returns:
+        uint64 array of shape (n_words,)
+    """
+    row = np.zeros(n_words, dtype=np.uint64)
+    for tag_id in tag_ids:
+        row[tag_id >> 6] |= np.uint64(1) << np.uint64(tag_id & 63)
+    return row
+
+
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    """
+    Count set bits in each row of a 2-D uint64 array.
+    
+    Uses np.bitwise_count (NumPy 2.0+) when available, otherwise unpacks
+    the bytes and sums the bits.
+    
+    Args:
+        words: uint64 array of shape (rows, n_words)
+        
+    Returns:
+        Integer array of shape (rows,)
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+@dataclass(frozen=True, eq=False)
+class GameTable:
+    """
+    Columnar (struct-of-arrays) view of the game catalog.
+    
+    Scoring only reads `masks`; the display columns are indexed for the
+    top N rows alone.
+    """
+    names: List[str]
+    app_ids: np.ndarray
+    store_urls: List[str]
+    tags: List[FrozenSet[str]]
+    tag_ids: Dict[str, int]
+    masks: np.ndarray
+    mask_counts: np.ndarray
+    # Ranked results per (user tag IDs, top_n); lives and dies with the table
+    _rank_memo: Dict[Tuple[FrozenSet[int], int], Tuple[Tuple[int, float], ...]] = field(
+        default_factory=dict, repr=False
+    )
+    # Tables are shared across Streamlit session threads; guards _rank_memo
+    _rank_memo_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # Specialized scorers per user tag count, built by _scorer()
+    _scorers: Dict[int, Callable[[np.ndarray], np.ndarray]] = field(
+        default_factory=dict, repr=False
+    )
+
+
+def _count_kernel(
+    masks: np.ndarray,
+    mask_counts: np.ndarray
+) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Pick the match-count kernel for a catalog and bind its masks.
+    
+    Uses the numba kernel for large catalogs when numba is installed, then
+    SimSIMD's packed-bit Hamming distance when simsimd is installed, and
+    otherwise a vectorized AND + popcount.
+    
+    Args:
+        masks: uint64 game masks of shape (games, n_words)
+        mask_counts: Set bits per game mask, shape (games,)
+        
+    Returns:
+        Function mapping a uint64 user mask of shape (n_words,) to the
+        number of user tags each game matches
+    """
+    numba_score_all = None
+    if len(masks) >= _NUMBA_MIN_ROWS:
+        # Imported lazily: loading numba costs more than scoring a small catalog
+        try:
+            from services.matching_numba import score_all as numba_score_all
+        except ImportError:
+            pass
+    
+    if numba_score_all is not None:
+        def count(user_row: np.ndarray) -> np.ndarray:
+            counts = np.empty(len(masks), dtype=np.int64)
+            numba_score_all(masks, user_row, counts)
+            return counts
+    elif simsimd is not None and masks.size:
+        packed = masks.view(np.uint8)
+        
+        def count(user_row: np.ndarray) -> np.ndarray:
+            # |A & B| = (|A| + |B| - hamming(A, B)) / 2, exact for integer counts
+            distances = np.asarray(simsimd.cdist(
+                user_row.view(np.uint8)[np.newaxis],
+                packed,
+                metric="hamming",
+                dtype="bin8"
+            ))[0]
+            user_count = int(_popcount_rows(user_row[np.newaxis])[0])
+            return ((mask_counts + user_count - distances) // 2).astype(np.int64)
+    else:
+        def count(user_row: np.ndarray) -> np.ndarray:
+            return _popcount_rows(masks & user_row)
+    return count
+
+
+def build_game_table(games: List[Dict], extra_tags: Iterable[str] = ()) -> GameTable:
+    """
+    Convert the game list into a GameTable with packed uint64 tag bitboards.
+    
+    A vocabulary of up to 64 tags fits in one word per game; larger
+    vocabularies use ceil(len(vocabulary) / 64) words.
+    
+    Args:
+        games: List of game dictionaries with 'name', 'app_id', 'tags', etc.
+        extra_tags: Tags users can pick that may not appear on any game
+        
+    Returns:
+        GameTable with one row per game, in catalog order
+    """
+    tag_ids = build_tag_ids(games, extra_tags)
+    n_words = (len(tag_ids) + 63) // 64
+    masks = np.zeros((len(games), n_words), dtype=np.uint64)
+    for row, game in enumerate(games):
+        masks[row] = _pack_tag_ids((tag_ids[tag] for tag in game.get("tags", ())), n_words)
+    return GameTable(
+        names=[game["name"] for game in games],
+        app_ids=np.array([game.get("app_id", 0) for game in games], dtype=np.int32),
+        store_urls=[game.get("store_url", "") for game in games],
+        tags=[_game_tag_set(game) for game in games],
+        tag_ids=tag_ids,
+        masks=masks,
+        mask_counts=_popcount_rows(masks),
+    )
+
+
+def _top_n_indices(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """
+    Select the indices of the top N scores, best first.
+    
+    Selection is O(G) via a partition; only the selected slice is sorted.
+    Ties are broken by catalog order, matching a stable full sort.
+    
+    Args:
+        scores: Score per game
+        top_n: Number of indices to return
+        
+    Returns:
+        Integer array of at most top_n game indices
+    """
+    if top_n <= 0:
+        return np.empty(0, dtype=np.intp)
+    if top_n < len(scores):
+        # Everything above the N-th best score is in; ties at it fill the rest
+        kth = -np.partition(-scores, top_n - 1)[top_n - 1]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:top_n - len(above)]
+        top = np.concatenate((above, ties))
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def calculate_match_score(
+    user_tags: Collection[str],
+    game_tags: List[str],
+    game_tag_set: Optional[FrozenSet[str]] = None
+) -> float:
     """
     Calculate the match percentage between user preferences and a game's tags.
     
     Uses the formula: (matching_tags / user_tags) * 100
     This ensures games are ranked by how well they match user preferences.
+    Kept for scoring a single game; get_recommendations() inlines the same
+    formula with 100 / len(user_tags) hoisted out of its loop.
     
     Args:
-        user_tags: List of tags selected by the user
+        user_tags: Tags selected by the user; a frozenset is used as-is without rehashing
         game_tags: List of tags associated with a game
+        game_tag_set: Precomputed frozenset(game_tags), used instead of game_tags if given
         
     Returns:
         Match percentage (0-100). Returns 0 if user has no tags.
@@ -21,33 +258,153 @@ def calculate_match_score(user_tags: List[str], game_tags: List[str]) -> float:
     if not user_tags:
         return 0.0
     
-    matching_tags = len(set(user_tags) & set(game_tags))
-    match_percentage = (matching_tags / len(user_tags)) * 100
-    return match_percentage
+    if game_tag_set is not None:
+        game_tags = game_tag_set
+    return len(frozenset(user_tags).intersection(game_tags)) * (100.0 / len(user_tags))
+
+
+def _scorer(table: GameTable, n_user_tags: int) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Specialize scoring for one table and user tag count.
+    
+    The kernel choice, the table's masks and 100 / n_user_tags are bound
+    once, leaving a single call per query on the hot path. Scorers are
+    kept on the table, so they are freed along with it.
+    
+    Args:
+        table: Catalog built by build_game_table()
+        n_user_tags: Denominator of the match percentage
+        
+    Returns:
+        Function mapping a packed user mask to the score of every game
+    """
+    scorer = table._scorers.get(n_user_tags)
+    if scorer is None:
+        count = _count_kernel(table.masks, table.mask_counts)
+        inv_len = 100.0 / n_user_tags if n_user_tags else 0.0
+        
+        def scorer(user_row: np.ndarray) -> np.ndarray:
+            return count(user_row) * inv_len
+        
+        table._scorers[n_user_tags] = scorer
+    return scorer
+
+
+def _rank_rows(
+    user_row: np.ndarray,
+    n_user_tags: int,
+    table: GameTable,
+    top_n: int
+) -> List[Tuple[int, float]]:
+    """Score every game against a packed user mask and select the top N matching rows."""
+    scores = _scorer(table, n_user_tags)(user_row)
+    
+    # Games sharing no tags with the user never enter the selection
+    matched = np.flatnonzero(scores)
+    top = matched[_top_n_indices(scores[matched], top_n)]
+    return [(int(i), float(scores[i])) for i in top]
+
+
+def rank_games(
+    user_tags: Collection[str],
+    table: GameTable,
+    top_n: int = 3
+) -> List[Tuple[int, float]]:
+    """
+    Rank all games in a GameTable with a bitwise AND and popcount over their masks.
+    
+    Args:
+        user_tags: List of tags from user quiz answers
+        table: Catalog built by build_game_table()
+        top_n: Number of recommendations to return (default 3)
+        
+    Returns:
+        List of tuples containing (row_index, match_score) sorted by score.
+        Games with no matching tags are omitted, so fewer than top_n may be returned.
+    """
+    user_row = _pack_tag_ids(intern_tags(user_tags, table.tag_ids), table.masks.shape[1])
+    return _rank_rows(user_row, len(user_tags), table, top_n)
+
+
+def rank_tag_ids(
+    user_tag_ids: AbstractSet[int],
+    table: GameTable,
+    top_n: int = 3
+) -> List[Tuple[int, float]]:
+    """
+    Rank all games in a GameTable against tag IDs already interned with intern_tags().
+    
+    Args:
+        user_tag_ids: Set of the user's tag IDs in table.tag_ids; a frozenset
+            is used as the memo key without copying
+        table: Catalog built by build_game_table()
+        top_n: Number of recommendations to return (default 3)
+        
+    Returns:
+        List of tuples containing (row_index, match_score) sorted by score.
+        Games with no matching tags are omitted, so fewer than top_n may be returned.
+    """
+    # Reruns with the same answers skip scoring; the memo is stored on the
+    # table, so a rebuilt table never sees stale entries or keeps old ones alive
+    key = (frozenset(user_tag_ids), top_n)
+    with table._rank_memo_lock:
+        ranked = table._rank_memo.get(key)
+    if ranked is None:
+        # Score outside the lock; a concurrent miss on the same key just
+        # computes the same result twice
+        user_row = _pack_tag_ids(key[0], table.masks.shape[1])
+        ranked = tuple(_rank_rows(user_row, len(key[0]), table, top_n))
+        with table._rank_memo_lock:
+            if key not in table._rank_memo and len(table._rank_memo) >= _RANK_MEMO_SIZE:
+                del table._rank_memo[next(iter(table._rank_memo))]
+            table._rank_memo[key] = ranked
+    return list(ranked)
 
 
 def get_recommendations(
-    user_tags: List[str],
+    user_tags: Collection[str],
     games: List[Dict],
-    top_n: int = 3
+    top_n: int = 3,
+    table: Optional[GameTable] = None
 ) -> List[Tuple[Dict, float]]:
     """
     Get top N game recommendations based on user tags.
     
+    When table is given, scoring is delegated to rank_games() and only the
+    top N rows are mapped back to their game dictionaries.
+    
     Args:
-        user_tags: List of tags from user quiz answers
+        user_tags: Tags from user quiz answers; a frozenset is used as-is without rehashing
         games: List of game dictionaries with 'name', 'id', 'tags', etc.
         top_n: Number of recommendations to return (default 3)
+        table: Result of build_game_table(games), if precomputed
         
     Returns:
-        List of tuples containing (game_dict, match_score) sorted by score
+        List of tuples containing (game_dict, match_score) sorted by score.
+        Games with no matching tags are omitted, so fewer than top_n may be returned.
     """
-    # Calculate scores for all games
-    game_scores = []
-    for game in games:
-        score = calculate_match_score(user_tags, game.get("tags", []))
-        game_scores.append((game, score))
+    if table is not None:
+        return [(games[i], score) for i, score in rank_games(user_tags, table, top_n)]
+    
+    if top_n <= 0:
+        return []
+    
+    user_set = frozenset(user_tags)
+    inv_len = 100.0 / len(user_tags) if user_tags else 0.0
+    
+    # Keep a min-heap of the best N (score, -index, game) entries; the
+    # negated index breaks ties in catalog order and never compares dicts
+    heap: List[Tuple[float, int, Dict]] = []
+    for i, game in enumerate(games):
+        tag_set = game.get("_tag_set")
+        if tag_set is None:
+            tag_set = game.get("tags", ())
+        if user_set.isdisjoint(tag_set):
+            continue
+        entry = (len(user_set.intersection(tag_set)) * inv_len, -i, game)
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
     
-    # Sort by score descending and return top N
-    game_scores.sort(key=lambda x: x[1], reverse=True)
-    return game_scores[:top_n]
+    return [(game, score) for score, _, game in sorted(heap, reverse=True)]
@@ -0,0 +1,47 @@
+"""
+Numba-compiled scoring kernel for large game catalogs.
+
+Optional: importing this module raises ImportError when numba is not
+installed, and services.matching falls back to its NumPy kernel.
+"""
+import numpy as np
+from numba import njit, prange
+
+
+# Typed constants keep the SWAR arithmetic in uint64 (mixing uint64 with
+# plain int literals makes numba promote to float64)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+_S1 = np.uint64(1)
+_S2 = np.uint64(2)
+_S4 = np.uint64(4)
+_S56 = np.uint64(56)
+
+
+@njit(inline="always")
+def _popcount64(x):
+    """Count set bits in a uint64 word with the classic SWAR reduction."""
+    x = x - ((x >> _S1) & _M1)
+    x = (x & _M2) + ((x >> _S2) & _M2)
+    x = (x + (x >> _S4)) & _M4
+    return (x * _H01) >> _S56
+
+
+@njit(parallel=True, cache=True)
+def score_all(masks, user_row, out):
+    """
+    Write the number of user tags each game matches into out.
+
+    Args:
+        masks: uint64 array of shape (games, n_words) from build_game_table()
+        user_row: uint64 array of shape (n_words,) with the user's tags
+        out: int64 array of shape (games,) to fill
+    """
+    n_rows, n_words = masks.shape
+    for i in prange(n_rows):
+        count = 0
+        for w in range(n_words):
+            count += _popcount64(masks[i, w] & user_row[w])
+        out[i] = count
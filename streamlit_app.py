@@ -2,10 +2,11 @@
 Steam Game Recommendation Quiz Web Application
 A Streamlit-based interactive quiz that recommends Steam games based on user preferences.
 """
-import json
 import streamlit as st
 from pathlib import Path
-from services.matching import get_recommendations
+from typing import Tuple
+from services.json_cache import load_json_cached
+from services.matching import GameTable, build_game_table, intern_tags, rank_tag_ids
 
 
 # Configure page
@@ -41,18 +42,69 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+DATA_DIR = Path(__file__).parent / "data"
+QUESTIONS_PATH = DATA_DIR / "questions.json"
+GAMES_PATH = DATA_DIR / "games.json"
+
+STEAM_HEADER_URL = "https://cdn.akamai.steamstatic.com/steam/apps/{app_id}/header.jpg"
+
 def load_questions() -> dict:
     """Load quiz questions from JSON file."""
-    questions_path = Path(__file__).parent / "data" / "questions.json"
-    with open(questions_path, "r") as f:
-        return json.load(f)
+    return load_json_cached(QUESTIONS_PATH)
 
 
 def load_games() -> dict:
-    """Load game database from JSON file."""
-    games_path = Path(__file__).parent / "data" / "games.json"
-    with open(games_path, "r") as f:
-        return json.load(f)
+    """Load game database from JSON file and precompute each game's tag set."""
+    games_data = load_json_cached(GAMES_PATH)
+    for game in games_data["games"]:
+        if "_tag_set" not in game:
+            game["_tag_set"] = frozenset(game.get("tags", ()))
+    return games_data
+
+
+def data_version() -> Tuple[float, float]:
+    """Return the mtimes of the data files, used to invalidate derived caches."""
+    return QUESTIONS_PATH.stat().st_mtime, GAMES_PATH.stat().st_mtime
+
+
+@st.cache_resource(max_entries=1)
+def load_quiz(version: Tuple[float, float]) -> tuple:
+    """
+    Build the game table and intern every option's tags against its vocabulary.
+    
+    Cached per data_version(), so it runs once per process until a data file changes;
+    the returned questions and table are shared across sessions. Tag IDs are only
+    valid for the version they were built with.
+    """
+    questions = load_questions()["questions"]
+    games = load_games()["games"]
+    option_tags = (tag for question in questions for option in question["options"] for tag in option["tags"])
+    table = build_game_table(games, extra_tags=option_tags)
+    # Copy the questions rather than annotating the cached JSON, which other
+    # versions' tables may still be reading
+    questions = [
+        dict(question, options=[
+            dict(option, tag_ids=intern_tags(option["tags"], table.tag_ids))
+            for option in question["options"]
+        ])
+        for question in questions
+    ]
+    return questions, table
+
+
+def session_tag_ids(table: GameTable, version: Tuple[float, float]) -> frozenset:
+    """
+    Return the session's tag IDs for the current table.
+    
+    IDs are interned once per answer; if the data files changed since, the
+    session's string tags are re-interned against the new vocabulary.
+    """
+    if st.session_state.user_tag_ids_version != version:
+        st.session_state.user_tag_ids = frozenset(
+            intern_tags(st.session_state.user_tags_frozen, table.tag_ids).tolist()
+        )
+        st.session_state.user_tag_ids_version = version
+    return st.session_state.user_tag_ids
 
 
 def initialize_session_state() -> None:
@@ -60,7 +112,13 @@ def initialize_session_state() -> None:
     if "current_question" not in st.session_state:
         st.session_state.current_question = 0
     if "user_tags" not in st.session_state:
-        st.session_state.user_tags = []
+        # dict keys act as an insertion-ordered set of unique tags
+        st.session_state.user_tags = {}
+    if "user_tags_frozen" not in st.session_state:
+        st.session_state.user_tags_frozen = frozenset()
+    if "user_tag_ids" not in st.session_state:
+        st.session_state.user_tag_ids = frozenset()
+        st.session_state.user_tag_ids_version = None
     if "quiz_complete" not in st.session_state:
         st.session_state.quiz_complete = False
 
@@ -68,7 +126,10 @@ def initialize_session_state() -> None:
 def reset_quiz() -> None:
     """Reset quiz to start over."""
     st.session_state.current_question = 0
-    st.session_state.user_tags = []
+    st.session_state.user_tags = {}
+    st.session_state.user_tags_frozen = frozenset()
+    st.session_state.user_tag_ids = frozenset()
+    st.session_state.user_tag_ids_version = None
     st.session_state.quiz_complete = False
 
 
@@ -101,38 +162,38 @@ def display_question(question: dict, question_num: int, total_questions: int) ->
     return selected_option
 
 
-def display_results(recommendations: list) -> None:
-    """Display game recommendations based on quiz results."""
+def display_results(recommendations: list, table: GameTable) -> None:
+    """Display game recommendations (row index, score) based on quiz results."""
     st.markdown("## 🎮 Your Game Recommendations")
     
     if not recommendations:
         st.warning("No matches found. Try the quiz again!")
         return
     
-    for idx, (game, score) in enumerate(recommendations, 1):
+    # Read session state once for all recommendations
+    user_tags_set = st.session_state.user_tags_frozen
+    
+    for idx, (row, score) in enumerate(recommendations, 1):
         col1, col2 = st.columns([1, 2])
         
         with col1:
             # Display game banner image
-            app_id = game.get("app_id")
-            img_url = f"https://cdn.akamai.steamstatic.com/steam/apps/{app_id}/header.jpg"
-            st.image(img_url, use_column_width=True)
+            app_id = table.app_ids[row]
+            st.image(STEAM_HEADER_URL.format(app_id=app_id), use_column_width=True)
         
         with col2:
-            st.markdown(f"### #{idx} - {game['name']}")
+            st.markdown(f"### #{idx} - {table.names[row]}")
             st.markdown(f"<p class='match-score'>Match: {score:.1f}%</p>", unsafe_allow_html=True)
             
             # Display matching tags
-            user_tags_set = set(st.session_state.user_tags)
-            game_tags_set = set(game.get("tags", []))
-            matching_tags = user_tags_set & game_tags_set
+            matching_tags = user_tags_set.intersection(table.tags[row])
             
             if matching_tags:
                 tags_str = ", ".join(sorted(matching_tags))
                 st.markdown(f"**Matching preferences:** {tags_str}")
             
             # Steam store link
-            store_url = game.get("store_url", "")
+            store_url = table.store_urls[row]
             if store_url:
                 st.markdown(f"[🔗 View on Steam Store]({store_url})")
         
@@ -148,11 +209,8 @@ def main() -> None:
     initialize_session_state()
     
     # Load data
-    questions_data = load_questions()
-    games_data = load_games()
-    
-    questions = questions_data["questions"]
-    games = games_data["games"]
+    version = data_version()
+    questions, table = load_quiz(version)
     total_questions = len(questions)
     
     # Quiz flow
@@ -175,8 +233,11 @@ def main() -> None:
         for idx, (col, option) in enumerate(zip(cols, current_q["options"])):
             with col:
                 if st.button(option["text"], use_container_width=True, key=f"q{st.session_state.current_question}_opt{idx}"):
-                    # Add tags to user selections
-                    st.session_state.user_tags.extend(option["tags"])
+                    # Add tags to user selections, skipping ones already chosen
+                    user_tag_ids = session_tag_ids(table, version)
+                    st.session_state.user_tag_ids = user_tag_ids.union(option["tag_ids"].tolist())
+                    st.session_state.user_tags.update(dict.fromkeys(option["tags"]))
+                    st.session_state.user_tags_frozen = frozenset(st.session_state.user_tags)
                     
                     # Move to next question or complete quiz
                     if st.session_state.current_question < total_questions - 1:
@@ -193,10 +254,10 @@ def main() -> None:
         st.divider()
         
         # Get recommendations
-        recommendations = get_recommendations(st.session_state.user_tags, games)
+        recommendations = rank_tag_ids(session_tag_ids(table, version), table)
         
         # Display results
-        display_results(recommendations)
+        display_results(recommendations, table)
         
         # Start over button
         if st.button("🔄 Start Over", use_container_width=True):
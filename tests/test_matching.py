@@ -0,0 +1,155 @@
+"""
+Equivalence tests for the recommendation scoring paths.
+
+Every kernel and the set-based path must rank exactly like the baseline
+algorithm: score = matching_tags / user_tags * 100, stable sort by score
+descending, games with no matching tags left out.
+"""
+import random
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from services import matching
+
+
+KERNELS = ["bitwise_count", "unpackbits", "simsimd", "numba"]
+
+
+def reference_recommendations(user_tags, games, top_n):
+    """Baseline ranking as (game_index, score) pairs."""
+    user_set = set(user_tags)
+    scored = [
+        (i, len(user_set & set(game["tags"])) / len(user_tags) * 100 if user_tags else 0.0)
+        for i, game in enumerate(games)
+    ]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [(i, score) for i, score in scored[:top_n] if score > 0]
+
+
+def random_catalog(rng, n_games, vocab_size):
+    """Random games drawn from a small vocabulary, so scores tie often."""
+    vocab = [f"tag{i}" for i in range(vocab_size)]
+    games = [
+        {"name": f"game{i}", "app_id": i, "tags": rng.sample(vocab, rng.randint(0, min(8, vocab_size)))}
+        for i in range(n_games)
+    ]
+    return games, vocab
+
+
+def assert_same_ranking(actual, expected):
+    assert [i for i, _ in actual] == [i for i, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+
+
+@pytest.fixture(params=KERNELS)
+def kernel(request, monkeypatch):
+    """Force one match-count kernel for the duration of a test."""
+    monkeypatch.setattr(matching, "_NUMBA_MIN_ROWS", 10 ** 9)
+    if request.param in ("bitwise_count", "unpackbits"):
+        monkeypatch.setattr(matching, "simsimd", None)
+        if request.param == "bitwise_count" and not hasattr(np, "bitwise_count"):
+            pytest.skip("np.bitwise_count needs NumPy 2.0")
+        if request.param == "unpackbits":
+            monkeypatch.delattr(np, "bitwise_count", raising=False)
+    elif request.param == "simsimd":
+        if matching.simsimd is None:
+            pytest.skip("simsimd is not installed")
+    elif request.param == "numba":
+        pytest.importorskip("numba")
+        monkeypatch.setattr(matching, "_NUMBA_MIN_ROWS", 0)
+    return request.param
+
+
+def test_kernels_match_reference(kernel):
+    rng = random.Random(0)
+    for _ in range(300):
+        # Vocabularies up to 150 tags cover masks of one to three words
+        games, vocab = random_catalog(rng, rng.randint(0, 40), rng.choice([3, 10, 64, 65, 150]))
+        table = matching.build_game_table(games)
+        user_tags = rng.sample(vocab + ["unknown"], rng.randint(0, min(6, len(vocab))))
+        top_n = rng.randint(0, len(games) + 2)
+        expected = reference_recommendations(user_tags, games, top_n)
+
+        assert_same_ranking(matching.rank_games(user_tags, table, top_n), expected)
+
+        # rank_tag_ids only sees interned tags, so compare on known tags alone
+        known = [tag for tag in user_tags if tag in table.tag_ids]
+        tag_ids = frozenset(matching.intern_tags(known, table.tag_ids).tolist())
+        assert_same_ranking(
+            matching.rank_tag_ids(tag_ids, table, top_n),
+            reference_recommendations(known, games, top_n)
+        )
+
+
+def test_set_path_matches_reference():
+    rng = random.Random(1)
+    for _ in range(300):
+        games, vocab = random_catalog(rng, rng.randint(0, 40), rng.choice([3, 10, 65]))
+        user_tags = rng.sample(vocab + ["unknown"], rng.randint(0, min(6, len(vocab))))
+        top_n = rng.randint(0, len(games) + 2)
+        ranked = matching.get_recommendations(user_tags, games, top_n)
+        actual = [(games.index(game), score) for game, score in ranked]
+        assert_same_ranking(actual, reference_recommendations(user_tags, games, top_n))
+
+
+def test_ties_at_cutoff_keep_catalog_order(kernel):
+    games = [{"name": f"game{i}", "tags": ["a"] if i != 4 else ["a", "b"]} for i in range(8)]
+    table = matching.build_game_table(games)
+    assert matching.rank_games(["a", "b"], table, 3) == [(4, 100.0), (0, 50.0), (1, 50.0)]
+
+
+def test_empty_catalog(kernel):
+    table = matching.build_game_table([])
+    assert matching.rank_games(["a"], table) == []
+    assert matching.get_recommendations(["a"], []) == []
+
+
+def test_top_n_zero(kernel):
+    games = [{"name": "game", "tags": ["a"]}]
+    table = matching.build_game_table(games)
+    assert matching.rank_games(["a"], table, 0) == []
+    assert matching.get_recommendations(["a"], games, 0) == []
+
+
+def test_top_n_indices_matches_stable_sort():
+    rng = np.random.default_rng(2)
+    for _ in range(1000):
+        scores = rng.integers(0, 4, size=rng.integers(0, 20)).astype(float)
+        top_n = int(rng.integers(0, 25))
+        expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:top_n]
+        assert list(matching._top_n_indices(scores, top_n)) == expected
+
+
+def test_rank_memo_is_thread_safe(monkeypatch):
+    # A tiny memo and frequent thread switches force evictions to interleave
+    monkeypatch.setattr(matching, "_RANK_MEMO_SIZE", 2)
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    games = [{"name": f"game{i}", "tags": [f"tag{i % 12}", f"tag{(i + 1) % 12}"]} for i in range(30)]
+    table = matching.build_game_table(games)
+    errors = []
+    start = threading.Barrier(16)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        start.wait()
+        try:
+            for _ in range(2000):
+                tag_ids = frozenset(rng.sample(range(12), rng.randint(1, 4)))
+                matching.rank_tag_ids(tag_ids, table)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(16)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
+    assert len(table._rank_memo) <= 2